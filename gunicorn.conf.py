@@ -7,19 +7,52 @@ bind = "0.0.0.0:8000"
 backlog = 2048
 
 # Worker processes
-workers = 2
+def available_cpus():
+    """
+    CPUs this container may actually use. cpu_count() reports the host's CPUs,
+    so check the cgroup v2 quota and the affinity mask first.
+    """
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, int(quota) // int(period))
+
+    except (OSError, ValueError):
+        pass
+
+    try:
+        return len(os.sched_getaffinity(0))
+
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+# Every worker opens up to DB_POOL_MAX connections, so keep
+# workers x DB_POOL_MAX below Postgres's max_connections (100 by default)
+workers = int(os.getenv("GUNICORN_WORKERS", min(available_cpus() * 2 + 1, 9)))
+# UvicornWorker picks uvloop + httptools automatically when they are installed
 worker_class = "uvicorn.workers.UvicornWorker"
 worker_connections = 1000
-timeout = 120
-keepalive = 2
+# Scrapers run in background threads, so requests themselves should never need long
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers periodically so slow leaks can't grow RSS forever. Not while a worker
+# owns the scheduler: recycling it would cut off running scrapes and skip cron ticks
+# until another worker takes the lock, so run the scheduler on its own replica
+# (RUN_SCHEDULER=1) and recycle the API replicas (RUN_SCHEDULER=0)
+max_requests = 0 if os.getenv("RUN_SCHEDULER", "1") == "1" else 1000
+max_requests_jitter = 50
 
 # Create log directory if it doesn't exist
 os.makedirs("/app/logs", exist_ok=True)
 
 # Logging
-accesslog = "-" 
+# Set ACCESS_LOG=0 to drop the per-request access line entirely
+accesslog = "-" if os.getenv("ACCESS_LOG", "1") == "1" else None
 errorlog = "-"   
-loglevel = "debug"
+loglevel = os.getenv("LOG_LEVEL", "info")
 capture_output = True
 enable_stdio_inheritance = True
 
@@ -41,4 +74,5 @@ certfile = None
 # Application settings
 chdir = "/app/src"
 pythonpath = "/app/src"
+# Workers still start their own app lifespan; src/app.py (acquire_scheduler_lock) file-locks the scheduler to one of them
 preload_app = True 
\ No newline at end of file
@@ -0,0 +1,486 @@
+import asyncio
+import fcntl
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+from scrapers.econ_scraper import scrape_and_store_economic_data
+from scrapers.fear_sentiment import fear_index
+from scrapers.earnings_scraper import scrape_all_earnings, scrape_next_week_earnings, scrape_both_weeks
+from scrapers.general_info import fetch_and_store_market_holidays
+from utils.logger import setup_logger
+from utils.http_client import close_session
+from utils.cache import cached_body
+from utils.db_manager import (
+    get_latest_economic_events,
+    get_latest_earnings,
+    get_latest_fear_greed,
+    get_latest_market_holidays,
+    get_latest_next_week_earnings,
+    get_table_age,
+    get_db_pool,
+    close_db_pool,
+    init_schema,
+)
+
+logger = setup_logger("api")
+
+# Only one replica should own the cron jobs; set RUN_SCHEDULER=0 on the others
+RUN_SCHEDULER = os.getenv("RUN_SCHEDULER", "1") == "1"
+SCHEDULER_LOCK_FILE = os.getenv("SCHEDULER_LOCK_FILE", "/tmp/market_dashboard_scheduler.lock")
+
+# Scrapers get their own threads so a long scrape can't starve the API's thread pools
+SCRAPER_THREADS = int(os.getenv("SCRAPER_THREADS", "4"))
+scraper_pool = ThreadPoolExecutor(max_workers=SCRAPER_THREADS, thread_name_prefix="scraper")
+
+# How long shutdown waits for a running scrape to finish; keep it under gunicorn's graceful_timeout
+SCRAPE_DRAIN_TIMEOUT = int(os.getenv("SCRAPE_DRAIN_TIMEOUT", "25"))
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Starts the scheduler and kicks off the initial scrape in the background,
+    so the API accepts requests immediately instead of after every scraper finishes.
+    """
+    # Open the pool's first connections now rather than on the first request
+    try:
+        await asyncio.to_thread(get_db_pool)
+
+    except Exception as e:
+        logger.error(f"Failed to warm DB connection pool: {e}")
+
+    # Create tables up front so the store functions never run DDL
+    await asyncio.to_thread(init_schema)
+
+    app.state.initial_scrape = None
+    if RUN_SCHEDULER and setup_scheduler():
+        logger.info("Running initial scraper execution in the background...")
+        app.state.initial_scrape = asyncio.create_task(run_initial_scrape())
+
+    yield
+
+    # Stop new jobs first, then let a running scrape finish rather than killing its browser mid-store
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+        logger.info("Scheduler stopped")
+
+    if scrape_lock.locked():
+        logger.info("Waiting for running scrapers to finish before shutdown")
+        try:
+            await asyncio.wait_for(scrape_lock.acquire(), timeout=SCRAPE_DRAIN_TIMEOUT)
+
+        except asyncio.TimeoutError:
+            logger.warning(f"Scrapers still running after {SCRAPE_DRAIN_TIMEOUT}s, shutting down anyway")
+
+    initial_scrape = app.state.initial_scrape
+    if initial_scrape and not initial_scrape.done():
+        initial_scrape.cancel()
+
+    scraper_pool.shutdown(wait=False, cancel_futures=True)
+    close_session()
+    close_db_pool()
+
+router = APIRouter()
+
+# Initialize scheduler as a global variable. It binds to uvicorn's event loop when
+# started from the lifespan hook; its jobs go through run_scrapers(), which runs the
+# blocking scrapers on scraper_pool so they never run on the loop or in the API's executors.
+# Missed runs are collapsed into one, and a job never overlaps with its own previous run.
+scheduler = AsyncIOScheduler(
+    job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 300}
+)
+
+# Held while scrapers run, so scheduled, startup and manual runs never overlap
+scrape_lock = asyncio.Lock()
+
+# Manually triggered runs, referenced until they finish so they aren't garbage collected,
+# and so a trigger is refused while an earlier one is still queued or running
+manual_scrapes = set()
+
+# Outcome of the most recent run_scrapers() call in this worker
+last_scrape = {"finished_at": None, "results": {}}
+
+# ---------------------------- RESPONSE HELPERS ----------------------------
+
+def etag_matches(if_none_match, etag):
+    """
+    Checks an If-None-Match header against our ETag. The header may list several
+    tags, use weak W/ tags (as proxies often send) or be '*'.
+    """
+    if not if_none_match:
+        return False
+
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+def etag_response(request, body, etag, cached_at, max_age=30):
+    """
+    Returns the body tagged with its ETag so clients and proxies can
+    revalidate with If-None-Match and receive a bodyless 304.
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}, must-revalidate",
+        "X-Cached-At": cached_at,
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def cached_response(request, fn, ttl):
+    """
+    Serves fn's rows from the response cache, reading the database at most
+    once per ttl. Stores invalidate the entry, so fresh rows show up right away.
+    """
+    body, etag, cached_at = await cached_body(fn, ttl=ttl)
+    return etag_response(request, body, etag, cached_at, max_age=ttl)
+
+# ---------------------------- API ENDPOINTS ----------------------------
+
+@router.get("/economic-events")
+async def get_economic_events(request: Request):
+    """
+    Get all economic events.
+    """
+    try:
+        return await cached_response(request, get_latest_economic_events, ttl=300)
+
+    except Exception as e:
+        logger.error(f"Failed to get economic events: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/earnings")
+async def get_earnings(request: Request):
+    """
+    Get all earnings data for this week.
+    """
+    try:
+        return await cached_response(request, get_latest_earnings, ttl=60)
+
+    except Exception as e:
+        logger.error(f"Failed to get earnings: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/next-week-earnings")
+async def get_next_week_earnings(request: Request):
+    """
+    Get all earnings data for next week.
+    """
+    try:
+        return await cached_response(request, get_latest_next_week_earnings, ttl=60)
+
+    except Exception as e:
+        logger.error(f"Failed to get next week earnings: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/market-holidays")
+async def get_market_holidays(request: Request):
+    """
+    Gets all market holidays.
+    """
+    try:
+        return await cached_response(request, get_latest_market_holidays, ttl=3600)
+
+    except Exception as e:
+        logger.error(f"Failed to get market holidays: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/fear-greed")
+async def get_fear_greed(request: Request):
+    """
+    Gets all fear & greed index data.
+    """
+    try:
+        return await cached_response(request, get_latest_fear_greed, ttl=30)
+
+    except Exception as e:
+        logger.error(f"Failed to get fear/greed index: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/status")
+async def get_status(request: Request):
+    """
+    Reports scheduler state, scheduled jobs and whether the
+    initial background scrape has finished in this worker.
+    """
+    initial_scrape = request.app.state.initial_scrape
+
+    # Only go back to the scheduler for jobs whose cached run time has passed
+    now = datetime.now(timezone.utc)
+    for job in jobs_snapshot:
+        if job["next_run_time"] and job["next_run_time"] <= now:
+            scheduled = scheduler.get_job(job["id"])
+            job["next_run_time"] = scheduled.next_run_time if scheduled else None
+
+    return {
+        "status": "success",
+        "scheduler_running": scheduler.running,
+        "initial_scrape_done": initial_scrape.done() if initial_scrape else None,
+        "scrape_running": scrape_lock.locked(),
+        "last_scrape": last_scrape,
+        "jobs": jobs_snapshot,
+    }
+
+@router.get("/trigger-scrapers", status_code=202)
+async def trigger_scrapers():
+    """
+    Starts all scrapers in the background and returns immediately.
+    Progress and results are reported by /status.
+    """
+    # Checked and registered without awaiting in between, so a second request can't slip in
+    if scrape_lock.locked() or manual_scrapes:
+        return ORJSONResponse(status_code=409, content={"status": "already_running"})
+
+    task = asyncio.create_task(run_scrapers(force=True))
+    manual_scrapes.add(task)
+    task.add_done_callback(manual_scrapes.discard)
+    return {"status": "accepted"}
+
+# ---------------------------- SCRAPER FUNCTIONS ----------------------------
+
+# Both earnings weeks come off the same TradingView page, so a full run scrapes
+# them together with one browser launch
+SCRAPERS = [
+    ("economic_data", scrape_and_store_economic_data),
+    ("fear_index", fear_index),
+    ("earnings", scrape_both_weeks),
+    ("market_holidays", fetch_and_store_market_holidays),
+]
+
+# Jobs that scrape a single earnings week on their own cadence, outside the full runs above
+SCHEDULED_SCRAPERS = {
+    "this_week_earnings": scrape_all_earnings,
+    "next_week_earnings": scrape_next_week_earnings,
+}
+
+# Manual runs skip the scrapers' own recent-refresh checks; scheduled and startup runs keep them
+FORCED_SCRAPERS = {
+    "economic_data": partial(scrape_and_store_economic_data, force=True),
+}
+
+# Tables each scraper fills and how old they may get before a restart re-scrapes them,
+# matching the cron cadence of the job that refreshes each table
+SCRAPER_FRESHNESS = {
+    "economic_data": [("economic_events", timedelta(days=1))],
+    "fear_index": [("fear_greed_index", timedelta(hours=1))],
+    "earnings": [
+        ("earnings_reports", timedelta(days=1)),
+        ("next_week_earnings_reports", timedelta(weeks=1)),
+    ],
+    "market_holidays": [("market_holidays", timedelta(weeks=1))],
+}
+
+def get_stale_scrapers():
+    """
+    Returns the names of scrapers with any table that is empty or older than its cadence.
+    """
+    stale = []
+    for name, tables in SCRAPER_FRESHNESS.items():
+        for table, max_age in tables:
+            age = get_table_age(table)
+            if age is None or age > max_age:
+                stale.append(name)
+                break
+
+    return stale
+
+async def run_initial_scrape():
+    """
+    Refreshes only the data that went stale while the app was down, so restarts
+    and recycled workers don't re-scrape everything that is still current.
+    """
+    stale = await asyncio.to_thread(get_stale_scrapers)
+    if not stale:
+        logger.info("All scraped data is fresh, skipping initial scrape")
+        return {}
+
+    logger.info(f"Refreshing stale data: {', '.join(stale)}")
+    return await run_scrapers(stale)
+
+async def run_scrapers(names=None, force=False):
+    """
+    Runs the named scrapers (all of them by default) once scrape_lock is free.
+    Used by the scheduled jobs and the startup scrape.
+    """
+    await scrape_lock.acquire()
+    return await run_locked_scrapers(names, force)
+
+async def run_locked_scrapers(names=None, force=False):
+    """
+    Runs the named scrapers concurrently on the scraper pool, so the total time is
+    the slowest scraper rather than the sum, then releases scrape_lock, which the
+    caller must already hold. force=True refreshes data even if a scraper considers it recent.
+    Returns the outcome of each scraper by name.
+    """
+    loop = asyncio.get_running_loop()
+
+    try:
+        if names is None:
+            selected = list(SCRAPERS)
+        else:
+            scraper_funcs = {**dict(SCRAPERS), **SCHEDULED_SCRAPERS}
+            selected = [(name, scraper_funcs[name]) for name in names]
+
+        if force:
+            selected = [(name, FORCED_SCRAPERS.get(name, scraper_func)) for name, scraper_func in selected]
+
+        logger.info(f"Starting scrapers: {', '.join(name for name, _ in selected)}")
+        start_time = time.time()
+
+        outcomes = await asyncio.gather(
+            *(loop.run_in_executor(scraper_pool, scraper_func) for _, scraper_func in selected),
+            return_exceptions=True
+        )
+
+    finally:
+        scrape_lock.release()
+
+    results = {}
+    for (name, _), outcome in zip(selected, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Scraper error ({name}): {outcome}")
+            results[name] = f"failed: {str(outcome)}"
+        else:
+            results[name] = "success"
+
+    last_scrape["finished_at"] = datetime.now()
+    last_scrape["results"] = results
+
+    duration = time.time() - start_time
+    logger.info(f"All scrapers finished in {duration:.2f}s")
+    return results
+
+# ---------------------------- SCHEDULER SETUP ----------------------------
+
+# Held open for the life of the process that owns the scheduler
+_scheduler_lock = None
+
+# Jobs as reported by /status, built once when the scheduler starts
+jobs_snapshot = []
+
+def acquire_scheduler_lock():
+    """
+    Takes a non-blocking file lock so only one gunicorn worker runs the cron jobs.
+    The lock is released automatically when that worker exits.
+    """
+    global _scheduler_lock
+    lock_file = open(SCHEDULER_LOCK_FILE, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    except OSError:
+        lock_file.close()
+        return False
+
+    _scheduler_lock = lock_file
+    return True
+
+def setup_scheduler():
+    """
+    Sets up scheduled scraper jobs. Safe to call more than once.
+    Returns False if another worker already owns the scheduler.
+    """
+    if scheduler.running:
+        return True
+
+    if _scheduler_lock is None and not acquire_scheduler_lock():
+        logger.info(f"Scheduler already running in another worker (pid {os.getpid()} skipping)")
+        return False
+
+    # Economic data - Every day at 4 PM
+    scheduler.add_job(
+        run_scrapers,
+        CronTrigger(hour=12, minute=35),
+        args=[["economic_data"]],
+        id="economic_data",
+        name="Economic Data Scraper",
+        replace_existing=True
+    )
+    
+    # Fear index - Every hour
+    scheduler.add_job(
+        run_scrapers,
+        CronTrigger(hour="*", minute=0),
+        args=[["fear_index"]],
+        id="fear_index",
+        name="Fear Index Scraper",
+        replace_existing=True
+    )
+    
+    # Earnings - Every day at 4 AM
+    scheduler.add_job(
+        run_scrapers,
+        CronTrigger(hour=4, minute=0),
+        args=[["this_week_earnings"]],
+        id="earnings",
+        name="Earnings Scraper",
+        replace_existing=True
+    )
+    
+    # Next Week Earnings - Every Monday at 12 PM
+    scheduler.add_job(
+        run_scrapers,
+        CronTrigger(day_of_week="mon", hour=12, minute=0),
+        args=[["next_week_earnings"]],
+        id="next_week_earnings",
+        name="Next Week Earnings Scraper",
+        replace_existing=True
+    )
+    
+    # Market holidays - Every Sunday at 6 PM
+    scheduler.add_job(
+        run_scrapers,
+        CronTrigger(day_of_week="sun", hour=18, minute=0),
+        args=[["market_holidays"]],
+        id="market_holidays",
+        name="Market Holidays Scraper",
+        replace_existing=True
+    )
+    
+    scheduler.start()
+    logger.info("Scheduler started successfully")
+
+    # Log all scheduled jobs
+    jobs = scheduler.get_jobs()
+    for job in jobs:
+        logger.info(f"Scheduled job: {job.name} - Next run: {job.next_run_time}")
+
+    jobs_snapshot[:] = [
+        {"id": job.id, "name": job.name, "next_run_time": job.next_run_time}
+        for job in jobs
+    ]
+
+    return True
+
+# ---------------------------- APP FACTORY ----------------------------
+
+def create_app():
+    """
+    Builds the FastAPI app with its middleware, routes and lifespan hook.
+    """
+    app = FastAPI(title="Market Dashboard API", default_response_class=ORJSONResponse, lifespan=lifespan)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # The earnings and economic event lists run to hundreds of rows; small payloads skip compression
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+    app.include_router(router)
+    return app
@@ -1,10 +1,143 @@
+from datetime import date, datetime, time as dt_time, timedelta, timezone
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 from utils.logger import setup_logger
+from utils.browser import block_heavy_resources
 from utils.db_manager import store_earnings_data, store_next_week_earnings_data
+from utils.http_client import get_session
 import time
 
 logger = setup_logger("scraper.earnings")
 
+# ---------------------------- SCANNER API ----------------------------
+
+# The JSON endpoint TradingView's earnings calendar page loads its table from
+SCANNER_URL = "https://scanner.tradingview.com/america/scan"
+
+# Companies that already reported this week have their *_next_* fields moved on to the
+# following quarter, so their figures are read from the last-release columns instead
+SCANNER_COLUMNS = [
+    "name",
+    "market_cap_basic",
+    "earnings_per_share_forecast_next_fq",
+    "earnings_per_share_fq",
+    "earnings_per_share_forecast_fq",
+    "revenue_forecast_next_fq",
+    "revenue_fq",
+    "revenue_forecast_fq",
+    "earnings_release_next_time",
+    "earnings_release_next_date",
+    "earnings_release_time",
+    "earnings_release_date",
+]
+
+# How the calendar labels the earnings release time codes
+RELEASE_TIMES = {
+    1: "Before Market Open",
+    2: "After Market Close",
+}
+
+# Week offset from the current one for each timeframe filter
+TIMEFRAME_WEEKS = {
+    "This Week": 0,
+    "Next Week": 1,
+}
+
+def format_value(value):
+    """
+    Formats a raw scanner number the way the calendar table shows it,
+    e.g. 2950000000000 -> '2.95 T'. Missing values become '—'.
+    """
+    if value is None:
+        return "—"
+
+    if not isinstance(value, (int, float)):
+        return str(value).strip() or "—"
+
+    for divisor, suffix in ((1e12, "T"), (1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(value) >= divisor:
+            return f"{value / divisor:.2f} {suffix}"
+
+    return f"{value:.2f}"
+
+def fetch_scanner_earnings(timeframe):
+    """
+    Fetches a week of earnings straight from TradingView's scanner API,
+    in the same shape scrape_earnings_data() returns.
+    Returns None if the request fails, so callers can fall back to the browser.
+    """
+    start_time = time.time()
+    monday = date.today() - timedelta(days=date.today().weekday()) + timedelta(weeks=TIMEFRAME_WEEKS[timeframe])
+    week_start = datetime.combine(monday, dt_time.min, tzinfo=timezone.utc)
+    week_end = week_start + timedelta(weeks=1)
+
+    week_range = [int(week_start.timestamp()), int(week_end.timestamp()) - 1]
+
+    # Same filter as the calendar page: released this week, or due to release this week
+    payload = {
+        "filter2": {
+            "operator": "or",
+            "operands": [
+                {"expression": {"left": "earnings_release_date", "operation": "in_range", "right": week_range}},
+                {"expression": {"left": "earnings_release_next_date", "operation": "in_range", "right": week_range}},
+            ],
+        },
+        "columns": SCANNER_COLUMNS,
+        "sort": {"sortBy": "market_cap_basic", "sortOrder": "desc"},
+        "range": [0, 5000],
+    }
+
+    try:
+        response = get_session().post(SCANNER_URL, json=payload, timeout=15)
+        response.raise_for_status()
+        rows = response.json().get("data", [])
+
+    except Exception as e:
+        logger.warning(f"Scanner API request for '{timeframe}' failed after {(time.time() - start_time):.2f}s: {e}")
+        return None
+
+    earnings_data = []
+    for index, row in enumerate(rows):
+        try:
+            fields = dict(zip(SCANNER_COLUMNS, row["d"]))
+            if not fields["name"]:
+                continue
+
+            released = fields["earnings_release_date"]
+            if released and week_range[0] <= released <= week_range[1]:
+                # Already reported this week: the last release has the actuals
+                release_date = released
+                release_time = fields["earnings_release_time"]
+                eps_estimate = fields["earnings_per_share_forecast_fq"]
+                reported_eps = fields["earnings_per_share_fq"]
+                revenue_forecast = fields["revenue_forecast_fq"]
+                reported_revenue = fields["revenue_fq"]
+            elif fields["earnings_release_next_date"]:
+                release_date = fields["earnings_release_next_date"]
+                release_time = fields["earnings_release_next_time"]
+                eps_estimate = fields["earnings_per_share_forecast_next_fq"]
+                reported_eps = None
+                revenue_forecast = fields["revenue_forecast_next_fq"]
+                reported_revenue = None
+            else:
+                continue
+
+            earnings_data.append({
+                "Ticker": fields["name"],
+                "Date Reporting": datetime.fromtimestamp(release_date, timezone.utc).date().isoformat(),
+                "EPS Estimate": format_value(eps_estimate),
+                "Reported EPS": format_value(reported_eps),
+                "Reported Revenue": format_value(reported_revenue),
+                "Revenue Forecast": format_value(revenue_forecast),
+                "Time": RELEASE_TIMES.get(release_time, "Unknown"),
+                "Market Cap": format_value(fields["market_cap_basic"]),
+            })
+
+        except Exception as e:
+            logger.warning(f"Skipping malformed scanner row {index} for '{timeframe}': {e}")
+
+    logger.info(f"Fetched {len(earnings_data)} '{timeframe}' earnings from the scanner API in {(time.time() - start_time):.2f}s")
+    return earnings_data
+
 # ---------------------------- BROWSER FUNCTIONS ----------------------------
 
 def open_earnings_calendar():
@@ -18,10 +151,11 @@ def open_earnings_calendar():
         p = sync_playwright().start()
         browser = p.chromium.launch(headless=True)
         context = browser.new_context()
+        block_heavy_resources(context)
         page = context.new_page()
         
         logger.debug("Navigating to earnings calendar")
-        page.goto("https://www.tradingview.com/markets/stocks-usa/earnings/", timeout=60000)
+        page.goto("https://www.tradingview.com/markets/stocks-usa/earnings/", wait_until="domcontentloaded", timeout=30000)
 
         logger.debug("Waiting for data table to load")
         page.wait_for_selector(".tv-data-table", timeout=30000)
@@ -37,6 +171,25 @@ def open_earnings_calendar():
 
 # ---------------------------- DATA EXTRACTION ----------------------------
 
+# Reads every row of the table inside the page in one call, instead of one
+# Playwright round-trip per cell
+EXTRACT_ROWS_JS = """
+() => Array.from(document.querySelectorAll('.tv-data-table__row')).map(row => {
+    const cell = key => row.querySelector(`[data-field-key='${key}']`);
+    const text = key => cell(key)?.innerText ?? '';
+    return {
+        name: text('name'),
+        market_cap: text('market_cap_basic'),
+        eps_estimate: text('earnings_per_share_forecast_next_fq'),
+        reported_eps: text('earnings_per_share_fq'),
+        revenue_forecast: text('revenue_forecast_next_fq'),
+        reported_revenue: text('revenue_fq'),
+        time: cell('earnings_release_next_time')?.getAttribute('title') ?? null,
+        date: text('earnings_release_next_date'),
+    };
+})
+"""
+
 def scrape_earnings_data(page, timeframe="This Week"):
     """
     Extracts earnings data from TradingView for all stocks.
@@ -53,7 +206,7 @@ def scrape_earnings_data(page, timeframe="This Week"):
     """
     # Applies the specified timeframe filter
     try:
-        timeframe_button = page.locator(f"//div[contains(@class, 'itemContent-LeZwGiB6') and contains(text(), '{timeframe}')]")
+        timeframe_button = page.locator("div[class*='itemContent-LeZwGiB6']", has_text=timeframe)
         timeframe_button.wait_for(timeout=10000)
         timeframe_button.click()
         logger.info(f"Clicked on '{timeframe}' button.")
@@ -61,17 +214,29 @@ def scrape_earnings_data(page, timeframe="This Week"):
     except PlaywrightTimeout as e:
         logger.error(f"Failed to click on '{timeframe}' button: {e}")
 
-    page.wait_for_selector(".tv-data-table", timeout=10000)
-    time.sleep(2)
+    # Wait for the filtered table to finish loading instead of sleeping a fixed time
+    page.wait_for_selector(".tv-data-table__row", timeout=10000)
+    try:
+        page.wait_for_load_state("networkidle", timeout=5000)
+
+    except PlaywrightTimeout:
+        logger.debug("Page still busy after timeframe change, continuing")
 
-    # Click all 'Load More' buttons
+    rows = page.locator(".tv-data-table__row")
+
+    # Click all 'Load More' buttons, moving on as soon as each new batch of rows appears
     while True:
         try:
             load_more_button = page.locator(".tv-load-more__btn")
             if load_more_button.is_visible():
+                previous_count = rows.count()
                 load_more_button.click()
                 logger.info("Clicked 'Load More' button. Loading more data.")
-                time.sleep(1)
+                page.wait_for_function(
+                    "count => document.querySelectorAll('.tv-data-table__row').length > count",
+                    arg=previous_count,
+                    timeout=10000
+                )
             else:
                 break
             
@@ -81,45 +246,26 @@ def scrape_earnings_data(page, timeframe="This Week"):
 
     # Extracts earnings data from table
     earnings_data = []
-    rows = page.locator(".tv-data-table__row")
-    row_count = rows.count()
-    logger.info(f"Scraping earnings for {row_count} stocks.")
-    time.sleep(5)
+    logger.info(f"Scraping earnings for {rows.count()} stocks.")
 
-    for index in range(row_count):
+    for index, row in enumerate(page.evaluate(EXTRACT_ROWS_JS)):
         try:
-            row = rows.nth(index)
-
-            # Extract ticker symbol
-            ticker_element = row.locator("[data-field-key='name']")
-            ticker_full = ticker_element.inner_text(timeout=3000).strip()
-            ticker_d = ticker_full.split("\n")[0]
+            # Ticker symbol
+            ticker_d = row["name"].strip().split("\n")[0]
             ticker = ticker_d[:-1] if ticker_d.endswith("D") else ticker_d
-
-            # Market cap
-            mtk_cap = row.locator("[data-field-key='market_cap_basic']").inner_text().strip("USD")
-
-            # EPS
-            eps_estimate = row.locator("[data-field-key='earnings_per_share_forecast_next_fq']").inner_text().strip("USD")
-            reported_eps = row.locator("[data-field-key='earnings_per_share_fq']").inner_text().strip("USD")
-
-            # Revenue
-            revenue_forecast = row.locator("[data-field-key='revenue_forecast_next_fq']").inner_text().strip("USD")
-            reported_revenue = row.locator("[data-field-key='revenue_fq']").inner_text().strip("USD")
-
-            # Time & date
-            time_reporting = row.locator("[data-field-key='earnings_release_next_time']").get_attribute("title") or "Unknown"
-            date_reporting = row.locator("[data-field-key='earnings_release_next_date']").inner_text().strip()
+            if not ticker:
+                logger.warning(f"Skipping row {index} with no ticker")
+                continue
 
             earnings_data.append({
                 "Ticker": ticker,
-                "Date Reporting": date_reporting,
-                "EPS Estimate": eps_estimate,
-                "Reported EPS": reported_eps,
-                "Reported Revenue": reported_revenue,
-                "Revenue Forecast": revenue_forecast,
-                "Time": time_reporting.strip() if time_reporting else "Unknown",
-                "Market Cap": mtk_cap,
+                "Date Reporting": row["date"].strip(),
+                "EPS Estimate": row["eps_estimate"].strip("USD"),
+                "Reported EPS": row["reported_eps"].strip("USD"),
+                "Reported Revenue": row["reported_revenue"].strip("USD"),
+                "Revenue Forecast": row["revenue_forecast"].strip("USD"),
+                "Time": (row["time"] or "Unknown").strip(),
+                "Market Cap": row["market_cap"].strip("USD"),
             })
 
         except Exception as e:
@@ -129,73 +275,104 @@ def scrape_earnings_data(page, timeframe="This Week"):
 
 # ---------------------------- MAIN FUNCTION ----------------------------
 
-def scrape_all_earnings():
+# Where each timeframe filter's rows are stored
+TIMEFRAME_STORES = {
+    "This Week": store_earnings_data,
+    "Next Week": store_next_week_earnings_data,
+}
+
+def store_timeframe(timeframe, earnings_data):
     """
-    Main function that:
-    1. Opens the earnings calendar
-    2. Scrapes the earnings data
-    3. Stores it in the database
+    Stores a timeframe's rows in its table, if there are any.
+    """
+    if earnings_data:
+        logger.debug(f"Found {len(earnings_data)} '{timeframe}' earnings records")
+        TIMEFRAME_STORES[timeframe](earnings_data)
+    else:
+        logger.warning(f"No '{timeframe}' earnings data found to store")
+
+def scrape_earnings_pages(timeframes):
+    """
+    Opens the earnings calendar once and, for each timeframe filter in turn,
+    scrapes the table on the same page and stores it.
+    Returns the scraped rows keyed by timeframe.
     """
     start_time = time.time()
-    
+    results = {timeframe: [] for timeframe in timeframes}
+
     p, browser, page = open_earnings_calendar()
     if not page:
         logger.error("Browser initialization failed")
-        return []
+        return results
 
     try:
-        logger.debug("Starting earnings data scrape")
-        earnings_data = scrape_earnings_data(page)
-        
-        if earnings_data:
-            logger.debug(f"Found {len(earnings_data)} earnings records")
-            store_earnings_data(earnings_data)
-            duration = time.time() - start_time
-            logger.info(f"Complete earnings scrape finished in {duration:.2f}s")
-        else:
-            logger.warning("No earnings data found to store")
-            
-        return earnings_data
+        for timeframe in timeframes:
+            try:
+                logger.debug(f"Starting '{timeframe}' earnings data scrape")
+                earnings_data = scrape_earnings_data(page, timeframe=timeframe)
+                store_timeframe(timeframe, earnings_data)
+                results[timeframe] = earnings_data
+
+            except Exception as e:
+                logger.error(f"Error scraping '{timeframe}' earnings after {(time.time() - start_time):.2f}s: {e}")
 
-    except Exception as e:
         duration = time.time() - start_time
-        logger.error(f"Error scraping earnings after {duration:.2f}s: {e}")
-        return []
+        logger.info(f"Browser earnings scrape ({', '.join(timeframes)}) finished in {duration:.2f}s")
+        return results
 
     finally:
         browser.close()
         p.stop()
 
-def scrape_next_week_earnings():
+def scrape_earnings_weeks(timeframes):
     """
-    Scrapes earnings data for next week's stocks.
+    Fetches and stores each timeframe's earnings from the scanner API, only
+    launching a browser for timeframes whose API request failed.
+    Returns the rows keyed by timeframe.
     """
     start_time = time.time()
-    
-    p, browser, page = open_earnings_calendar()
-    if not page:
-        logger.error("Browser initialization failed")
-        return []
+    results = {}
+    browser_timeframes = []
 
-    try:
-        logger.debug("Starting next week earnings data scrape")
-        earnings_data = scrape_earnings_data(page, timeframe="Next Week")
-        
-        if earnings_data:
-            logger.debug(f"Found {len(earnings_data)} next week earnings records")
-            store_next_week_earnings_data(earnings_data)
-            duration = time.time() - start_time
-            logger.info(f"Complete next week earnings scrape finished in {duration:.2f}s")
-        else:
-            logger.warning("No next week earnings data found to store")
-            
-        return earnings_data
+    for timeframe in timeframes:
+        try:
+            earnings_data = fetch_scanner_earnings(timeframe)
 
-    except Exception as e:
-        duration = time.time() - start_time
-        logger.error(f"Error scraping next week earnings after {duration:.2f}s: {e}")
-        return []
+        except Exception as e:
+            logger.error(f"Error fetching '{timeframe}' earnings from the scanner API: {e}")
+            earnings_data = None
 
-    finally:
-        browser.close()
-        p.stop()
+        # An empty week is a valid answer; only a failed request needs the browser
+        if earnings_data is None:
+            browser_timeframes.append(timeframe)
+            continue
+
+        store_timeframe(timeframe, earnings_data)
+        results[timeframe] = earnings_data
+
+    if browser_timeframes:
+        logger.info(f"Falling back to the browser for: {', '.join(browser_timeframes)}")
+        results.update(scrape_earnings_pages(browser_timeframes))
+
+    duration = time.time() - start_time
+    logger.info(f"Complete earnings scrape ({', '.join(timeframes)}) finished in {duration:.2f}s")
+    return results
+
+def scrape_all_earnings():
+    """
+    Scrapes and stores earnings data for this week's stocks.
+    """
+    return scrape_earnings_weeks(("This Week",))["This Week"]
+
+def scrape_next_week_earnings():
+    """
+    Scrapes and stores earnings data for next week's stocks.
+    """
+    return scrape_earnings_weeks(("Next Week",))["Next Week"]
+
+def scrape_both_weeks():
+    """
+    Scrapes this week's and next week's earnings, sharing one browser launch
+    if either needs the fallback.
+    """
+    return scrape_earnings_weeks(("This Week", "Next Week"))
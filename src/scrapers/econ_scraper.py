@@ -1,11 +1,99 @@
-from datetime import datetime
+from datetime import date, datetime, time as dt_time, timedelta, timezone
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 from utils.logger import setup_logger
-from utils.db_manager import store_economic_data
+from utils.browser import block_heavy_resources
+from utils.db_manager import store_economic_data, get_table_age
+from utils.http_client import get_session
 import time
 
 logger = setup_logger("scraper.economic")
 
+# ---------------------------- CALENDAR API ----------------------------
+
+# A refresh within this window is skipped, since the week's events won't have changed
+MIN_REFRESH_INTERVAL = timedelta(hours=1)
+
+# The JSON endpoint TradingView's economic calendar widget loads its events from
+EVENTS_URL = "https://economic-calendar.tradingview.com/events"
+
+# The USDCAD calendar page with the "High Importance" filter applied
+EVENT_COUNTRIES = "US,CA"
+HIGH_IMPORTANCE = 1
+
+# Country names as the calendar page displays them
+COUNTRY_NAMES = {
+    "US": "United States",
+    "CA": "Canada",
+}
+
+def format_event_value(event, field):
+    """
+    Formats an actual/forecast/previous number with its scale and unit
+    the way the calendar shows it, e.g. 3.2 + '%' -> '3.2%'.
+    """
+    value = event.get(field)
+    if value is None:
+        return "N/A"
+
+    if isinstance(value, (int, float)):
+        number = f"{value:f}".rstrip("0").rstrip(".")
+    else:
+        number = str(value).strip() or "N/A"
+    return f"{number}{event.get('scale') or ''}{event.get('unit') or ''}"
+
+def fetch_calendar_events():
+    """
+    Fetches this week's high-importance US and Canadian events straight from
+    TradingView's calendar API, in the same shape scrape_economic_data() returns.
+    Returns an empty list if the request fails, so the caller can fall back to the browser.
+    """
+    start_time = time.time()
+    monday = date.today() - timedelta(days=date.today().weekday())
+    week_start = datetime.combine(monday, dt_time.min, tzinfo=timezone.utc)
+    week_end = week_start + timedelta(weeks=1)
+
+    params = {
+        "from": week_start.isoformat().replace("+00:00", "Z"),
+        "to": week_end.isoformat().replace("+00:00", "Z"),
+        "countries": EVENT_COUNTRIES,
+        "minImportance": HIGH_IMPORTANCE,
+    }
+
+    try:
+        # The endpoint only answers requests that look like they come from the site
+        response = get_session().get(EVENTS_URL, params=params, headers={"Origin": "https://www.tradingview.com"}, timeout=15)
+        response.raise_for_status()
+        events = response.json().get("result", [])
+
+    except Exception as e:
+        logger.warning(f"Economic calendar API request failed after {(time.time() - start_time):.2f}s: {e}")
+        return []
+
+    econ_data = []
+    for event in events:
+        try:
+            if event.get("importance", HIGH_IMPORTANCE) < HIGH_IMPORTANCE or not event.get("date"):
+                continue
+
+            # Accepts timestamps with or without milliseconds
+            event_date = datetime.fromisoformat(event["date"].replace("Z", "+00:00"))
+            econ_data.append({
+                "date": event_date.strftime("%Y-%m-%d %H:%M:%S"),
+                "time": event_date.strftime("%H:%M"),
+                "country": COUNTRY_NAMES.get(event.get("country"), event.get("country") or "N/A"),
+                "event": event.get("title") or "N/A",
+                "actual": format_event_value(event, "actual"),
+                "forecast": format_event_value(event, "forecast"),
+                "prior": format_event_value(event, "previous")
+            })
+
+        except Exception as e:
+            logger.warning(f"Skipping malformed calendar event {event!r:.200}: {e}")
+            continue
+
+    logger.info(f"Fetched {len(econ_data)} economic events from the calendar API in {(time.time() - start_time):.2f}s")
+    return econ_data
+
 # ---------------------------- HELPER FUNCTIONS ----------------------------
 
 def clean_text(value):
@@ -14,7 +102,8 @@ def clean_text(value):
     Returns 'N/A' if value is None.
     """
     cleaned = value.replace("\n", "").strip() if value else "N/A"
-    logger.debug(f"Cleaned text value: {value} -> {cleaned}")
+    # Called for every value of every row, so the message is only formatted when debug is on
+    logger.debug("Cleaned text value: %s -> %s", value, cleaned)
     return cleaned
 
 def format_date(date_string):
@@ -42,10 +131,11 @@ def open_economic_calendar():
         p = sync_playwright().start()
         browser = p.chromium.launch(headless=True)
         context = browser.new_context(viewport={"width": 1920, "height": 1080})
+        block_heavy_resources(context)
         page = context.new_page()
 
         logger.debug("Navigating to economic calendar")
-        page.goto("https://www.tradingview.com/symbols/USDCAD/economic-calendar/?exchange=FX_IDC", timeout=60000)
+        page.goto("https://www.tradingview.com/symbols/USDCAD/economic-calendar/?exchange=FX_IDC", wait_until="domcontentloaded", timeout=30000)
         
         logger.debug("Waiting for calendar items to load")
         page.wait_for_selector("div[data-name*='economic-calendar-item']", timeout=30000)
@@ -70,16 +160,21 @@ def filter_option(page):
         logger.debug("Looking for importance filter button")
         importance_button = page.locator('button:has-text("Importance")')
         importance_button.scroll_into_view_if_needed()
-        time.sleep(1)
         importance_button.click()
         logger.debug("Clicked importance filter")
         
         logger.debug("Looking for 'This Week' button")
         this_week_button = page.locator('button:has-text("This week")')
         this_week_button.scroll_into_view_if_needed()
-        time.sleep(1)
         this_week_button.click()
-        
+
+        # Move on as soon as the filtered calendar has loaded rather than after a fixed sleep
+        try:
+            page.wait_for_load_state("networkidle", timeout=5000)
+
+        except PlaywrightTimeout:
+            logger.debug("Calendar still busy after applying filters, continuing")
+
         duration = time.time() - start_time
         logger.debug(f"Applied calendar filters in {duration:.2f}s")
         
@@ -89,6 +184,21 @@ def filter_option(page):
 
 # ---------------------------- DATA EXTRACTION ----------------------------
 
+# Reads every calendar row inside the page in one call, instead of several
+# Playwright round-trips per field
+EXTRACT_EVENTS_JS = """
+() => Array.from(document.querySelectorAll("div[data-name*='economic-calendar-item']")).map(row => {
+    const text = selector => row.querySelector(selector)?.textContent ?? null;
+    return {
+        datetime: row.querySelector('time')?.getAttribute('datetime') ?? null,
+        time: text("span[class*=eventTime]"),
+        country: text("span[class*='countryName']"),
+        event: text("span[class*='titleText']"),
+        values: Array.from(row.querySelectorAll("span[class*='valueWithUnit']"), el => el.textContent),
+    };
+})
+"""
+
 def scrape_economic_data(page):
     """
     Extracts economic event data from the filtered calendar.
@@ -108,8 +218,8 @@ def scrape_economic_data(page):
         logger.warning("No economic calendar data available. Skipping scrape.")
         return []
 
-    rows = page.locator("div[data-name*='economic-calendar-item']")
-    count = rows.count()
+    rows = page.evaluate(EXTRACT_EVENTS_JS)
+    count = len(rows)
 
     if count == 0:
         logger.warning("No economic calendar rows found. Skipping.")
@@ -118,37 +228,18 @@ def scrape_economic_data(page):
     econ_data = []
     logger.info(f"Scraping Econ Events for {count} events.")
 
-    for index in range(count):
+    for index, row in enumerate(rows):
         try:
-            row = rows.nth(index)
-
-            # Date
-            date_element = row.locator("time")
-            event_date = format_date(date_element.get_attribute("datetime")) if date_element.count() > 0 else "N/A"
-
-            # Time
-            event_time = row.locator("span[class*=eventTime]").text_content(timeout=2000).strip() if row.locator("span[class*=eventTime]").count() > 0 else "N/A"
-
-            # Country
-            country = row.locator("span[class*='countryName']").first.text_content().strip() if row.locator("span[class*='countryName']").count() > 0 else "N/A"
-
-            # Event name
-            event_name = row.locator("span[class*='titleText']").first.text_content().strip() if row.locator("span[class*='titleText']").count() > 0 else "N/A"
-
-            # Actual, Forecast, Prior
-            values = row.locator("span[class*='valueWithUnit']")
-            actual = clean_text(values.nth(0).text_content() or "") if values.count() > 0 else "N/A"
-            forecast = clean_text(values.nth(1).text_content() or "") if values.count() > 1 else "N/A"
-            prior = clean_text(values.nth(2).text_content() or "") if values.count() > 2 else "N/A"
+            values = row["values"]
 
             econ_data.append({
-                "date": event_date,
-                "time": event_time,
-                "country": country,
-                "event": event_name,
-                "actual": actual,
-                "forecast": forecast,
-                "prior": prior
+                "date": format_date(row["datetime"]) if row["datetime"] else "N/A",
+                "time": row["time"].strip() if row["time"] is not None else "N/A",
+                "country": row["country"].strip() if row["country"] is not None else "N/A",
+                "event": row["event"].strip() if row["event"] is not None else "N/A",
+                "actual": clean_text(values[0]) if len(values) > 0 else "N/A",
+                "forecast": clean_text(values[1]) if len(values) > 1 else "N/A",
+                "prior": clean_text(values[2]) if len(values) > 2 else "N/A"
             })
 
         except Exception as e:
@@ -158,16 +249,11 @@ def scrape_economic_data(page):
 
 # ---------------------------- MAIN FUNCTION ----------------------------
 
-def scrape_and_store_economic_data():
+def scrape_calendar_page():
     """
-    Main function that:
-    1. Opens the economic calendar
-    2. Applies filters
-    3. Scrapes the data
-    4. Stores it in the database
+    Opens the economic calendar in a browser, applies the filters
+    and scrapes the events. Used when the calendar API is unavailable.
     """
-    start_time = time.time()
-    
     p, browser, page = open_economic_calendar()
     if not page:
         logger.error("Browser initialization failed")
@@ -176,10 +262,35 @@ def scrape_and_store_economic_data():
     try:
         logger.debug("Applying calendar filters")
         filter_option(page)
-        time.sleep(2)
         
         logger.debug("Starting economic data scrape")
-        economic_data = scrape_economic_data(page)
+        return scrape_economic_data(page)
+
+    finally:
+        browser.close()
+        p.stop()
+
+def scrape_and_store_economic_data(force=False):
+    """
+    Main function that:
+    1. Skips the run if the events were stored within the last hour (unless forced)
+    2. Fetches this week's events from the calendar API
+    3. Falls back to scraping the calendar page if that fails
+    4. Stores them in the database
+    """
+    start_time = time.time()
+
+    try:
+        if not force:
+            age = get_table_age("economic_events")
+            if age is not None and age < MIN_REFRESH_INTERVAL:
+                logger.info(f"Economic events were refreshed {age} ago, skipping scrape")
+                return []
+
+        economic_data = fetch_calendar_events()
+        if not economic_data:
+            logger.info("Falling back to the browser for the economic calendar")
+            economic_data = scrape_calendar_page()
 
         if economic_data:
             logger.debug(f"Found {len(economic_data)} economic events")
@@ -195,7 +306,3 @@ def scrape_and_store_economic_data():
         duration = time.time() - start_time
         logger.error(f"Error scraping economic data after {duration:.2f}s: {e}")
         return []
-
-    finally:
-        browser.close()
-        p.stop()
@@ -1,62 +1,82 @@
 import time
+import orjson
+from bisect import bisect_left
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 from utils.logger import setup_logger
 from utils.db_manager import store_fear_greed_index, get_latest_fear_greed
+from utils.http_client import get_session
 
 logger = setup_logger("scraper.sentiment")
 
+# The JSON endpoint CNN's Fear & Greed dial is drawn from
+GRAPHDATA_URL = "https://production.dataviz.cnn.io/index/fearandgreed/graphdata"
+
+# CNN rejects requests without a browser user agent
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
+
 # ---------------------------- HELPER FUNCTION ----------------------------
 
+# Upper bound of each category's range (inclusive); anything above the last is Extreme Greed
+FEAR_BOUNDS = (25, 44, 55, 74)
+FEAR_CATEGORIES = ("Extreme Fear", "Fear", "Neutral", "Greed", "Extreme Greed")
+
 def get_fear_category(fear_value):
     """
     Returns the Fear & Greed category based on the given value (0-100).
     """
     try:
         fear_value = int(fear_value)
-        logger.debug(f"Categorizing fear value: {fear_value}")
-
-        if 0 <= fear_value <= 25:
-            return "Extreme Fear"
-        elif 26 <= fear_value <= 44:
-            return "Fear"
-        elif 45 <= fear_value <= 55:
-            return "Neutral"
-        elif 56 <= fear_value <= 74:
-            return "Greed"
-        elif 75 <= fear_value <= 100:
-            return "Extreme Greed"
-        else:
-            logger.warning(f"Fear value {fear_value} outside expected range 0-100")
-            return "Unknown"
-        
-    except ValueError:
+
+    except (TypeError, ValueError):
         logger.error(f"Invalid fear value provided: {fear_value}")
         return "Unknown"
 
-# ---------------------------- MAIN FUNCTION ----------------------------
+    if not 0 <= fear_value <= 100:
+        logger.warning(f"Fear value {fear_value} outside expected range 0-100")
+        return "Unknown"
 
-def fear_index(headless=True):
+    return FEAR_CATEGORIES[bisect_left(FEAR_BOUNDS, fear_value)]
+
+# ---------------------------- FETCH FUNCTIONS ----------------------------
+
+def fetch_fear_value():
     """
-    Scrapes CNN's Fear & Greed Index, stores it in the database, and returns the current data.
-    Returns a list containing the fear value, category, and stored date, or empty list if failed.
+    Fetches the current index value from CNN's graphdata API.
+    Returns None if the request fails, so the caller can fall back to the browser.
     """
     start_time = time.time()
+    try:
+        response = get_session().get(GRAPHDATA_URL, headers={"User-Agent": USER_AGENT}, timeout=10)
+        response.raise_for_status()
+
+        score = orjson.loads(response.content)["fear_and_greed"]["score"]
+        logger.debug(f"Fetched fear value {score} from CNN API in {(time.time() - start_time):.2f}s")
+        return int(round(score))
+
+    except Exception as e:
+        logger.warning(f"CNN graphdata request failed after {(time.time() - start_time):.2f}s: {e}")
+        return None
+
+def scrape_fear_value(headless=True):
+    """
+    Reads the index value off CNN's Fear & Greed page with Playwright.
+    Returns None if it can't be found.
+    """
+    p = browser = None
     try:
         logger.debug("Starting Playwright for fear index scrape")
         p = sync_playwright().start()
         browser = p.chromium.launch(headless=headless)
         context = browser.new_context(
             viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
+            user_agent=USER_AGENT
         )
         page = context.new_page()
 
         logger.debug("Navigating to CNN Fear & Greed page")
-        page.goto("https://www.cnn.com/markets/fear-and-greed", timeout=60000)
-        
-        # Wait for the page to be fully loaded
-        page.wait_for_load_state('networkidle')
-        time.sleep(5)  
+        # CNN's ad traffic means the page rarely goes network-idle, so the selector waits below
+        # are what wait for the dial to render
+        page.goto("https://www.cnn.com/markets/fear-and-greed", wait_until="domcontentloaded", timeout=30000)
 
         selectors = [
             "span.dial-number-value",
@@ -65,8 +85,6 @@ def fear_index(headless=True):
             "div[class*='fear-greed'] span[class*='number']"
         ]
 
-        fear_value = None
-
         for selector in selectors:
             try:
                 logger.debug(f"Trying selector: {selector}")
@@ -76,13 +94,45 @@ def fear_index(headless=True):
                     if fear_value_text and fear_value_text.strip().isdigit():
                         fear_value = int(fear_value_text.strip())
                         logger.debug(f"Found fear value: {fear_value} using selector: {selector}")
-                        break
+                        return fear_value
 
             except Exception as e:
                 logger.debug(f"Selector {selector} failed: {e}")
                 continue
 
-        if not fear_value:
+        return None
+
+    except PlaywrightTimeout as e:
+        logger.error(f"Timeout loading CNN Fear & Greed page: {e}")
+        return None
+
+    finally:
+        try:
+            if browser:
+                browser.close()
+
+            if p:
+                p.stop()
+            
+        except Exception:
+            pass
+
+# ---------------------------- MAIN FUNCTION ----------------------------
+
+def fear_index(headless=True):
+    """
+    Fetches CNN's Fear & Greed Index, stores it in the database, and returns the current data.
+    Uses CNN's JSON API, only launching a browser if that fails.
+    Returns a list containing the fear value, category, and stored date, or empty list if failed.
+    """
+    start_time = time.time()
+    try:
+        fear_value = fetch_fear_value()
+        if fear_value is None:
+            logger.info("Falling back to the browser for the fear index")
+            fear_value = scrape_fear_value(headless=headless)
+
+        if fear_value is None:
             raise Exception("Unable to find fear value on the page")
 
         category = get_fear_category(fear_value)
@@ -99,20 +149,7 @@ def fear_index(headless=True):
             "Stored Date": latest_entry[0]["Date"] if latest_entry else "N/A"
         }]
 
-    except PlaywrightTimeout as e:
-        duration = time.time() - start_time
-        logger.error(f"Timeout scraping Fear & Greed index after {duration:.2f}s: {e}")
-        return []
-
     except Exception as e:
         duration = time.time() - start_time
         logger.error(f"Error scraping Fear & Greed index after {duration:.2f}s: {e}")
         return []
-
-    finally:
-        try:
-            browser.close()
-            p.stop()
-            
-        except Exception:
-            pass
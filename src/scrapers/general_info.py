@@ -1,8 +1,10 @@
+import orjson
 import requests
-from datetime import datetime
+from datetime import date
 from dotenv import load_dotenv
 from utils.logger import setup_logger
 from utils.db_manager import store_market_holidays
+from utils.http_client import get_session
 import os
 import time
 
@@ -13,6 +15,42 @@ load_dotenv()
 logger = setup_logger("scraper.holidays")
 POLYGON_API_KEY = os.getenv("POLYGON_API_KEY")
 
+# Polygon's holiday list changes a few times a year, so a day-old copy on disk is fine
+HOLIDAYS_CACHE_FILE = os.getenv("HOLIDAYS_CACHE_FILE", "/tmp/polygon_holidays.json")
+HOLIDAYS_CACHE_TTL = 86400
+
+# ------------------------------ DISK CACHE ------------------------------
+
+def load_cached_holidays():
+    """
+    Returns the raw Polygon response saved on disk if it is less than a day old, otherwise None.
+    """
+    try:
+        if time.time() - os.path.getmtime(HOLIDAYS_CACHE_FILE) > HOLIDAYS_CACHE_TTL:
+            return None
+
+        with open(HOLIDAYS_CACHE_FILE, "rb") as f:
+            holidays_data = orjson.loads(f.read())
+
+        return holidays_data if isinstance(holidays_data, list) and holidays_data else None
+
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+def save_cached_holidays(content):
+    """
+    Saves the raw Polygon response to disk, replacing the file atomically.
+    """
+    try:
+        tmp_file = f"{HOLIDAYS_CACHE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(content)
+
+        os.replace(tmp_file, HOLIDAYS_CACHE_FILE)
+
+    except OSError as e:
+        logger.warning(f"Failed to cache market holidays on disk: {e}")
+
 # ------------------------------ FETCH HOLIDAYS ------------------------------
 
 def get_market_holidays():
@@ -22,32 +60,38 @@ def get_market_holidays():
     """
     start_time = time.time()
     try:
-        current_year = datetime.now().year
+        current_year = date.today().year
         url = "https://api.polygon.io/v1/marketstatus/upcoming"
-        params = { "apiKey": POLYGON_API_KEY }
+        # Sent as a header so the key never ends up in a logged URL
+        headers = {"Authorization": f"Bearer {POLYGON_API_KEY}"}
 
-        logger.debug("Making request to Polygon.io for market holidays")
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        
-        holidays_data = response.json()
-        processed_holidays = []
+        holidays_data = load_cached_holidays()
+        if holidays_data is not None:
+            logger.debug("Using market holidays cached on disk")
+        else:
+            logger.debug("Making request to Polygon.io for market holidays")
+            response = get_session().get(url, headers=headers, timeout=10)
+            response.raise_for_status()
+
+            holidays_data = orjson.loads(response.content)
+            if not isinstance(holidays_data, list) or not holidays_data:
+                logger.error(f"Unexpected market holidays response from Polygon.io: {response.content[:200]!r}")
+                return []
+
+            # Only a usable list is cached, so an error payload isn't served for a day
+            save_cached_holidays(response.content)
 
         logger.debug(f"Processing {len(holidays_data)} holidays")
-        for holiday in holidays_data:
-            try:
-                holiday_data = {
-                    "name": holiday.get("name", "Unknown"),
-                    "date": holiday.get("date"),
-                    "status": holiday.get("status", "closed"),
-                    "exchange": holiday.get("exchange", "NYSE"),
-                    "year": current_year
-                }
-                processed_holidays.append(holiday_data)
-                logger.debug(f"Processed holiday: {holiday_data['name']} on {holiday_data['date']}")
-
-            except KeyError as e:
-                logger.warning(f"Missing data for holiday: {e}")
+        processed_holidays = [
+            {
+                "name": holiday.get("name", "Unknown"),
+                "date": holiday.get("date"),
+                "status": holiday.get("status", "closed"),
+                "exchange": holiday.get("exchange", "NYSE"),
+                "year": current_year
+            }
+            for holiday in holidays_data
+        ]
         
         duration = time.time() - start_time
         logger.info(f"Fetched {len(processed_holidays)} market holidays in {duration:.2f}s")
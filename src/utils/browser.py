@@ -0,0 +1,12 @@
+# Resource types the scrapers never read; aborting them saves bandwidth and render time.
+# Stylesheets are left alone since visibility checks like is_visible() depend on them.
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+def block_heavy_resources(context):
+    """
+    Aborts image, font and media requests for every page in the browser context.
+    """
+    context.route(
+        "**/*",
+        lambda route: route.abort() if route.request.resource_type in BLOCKED_RESOURCE_TYPES else route.continue_()
+    )
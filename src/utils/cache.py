@@ -0,0 +1,85 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import orjson
+
+# ---------------------------- RESPONSE CACHE ----------------------------
+
+# Scrapers refresh hourly at most, so short-lived copies of the DB reads are safe to serve
+_cache = {}
+
+# DB reads currently running, keyed like the cache, so concurrent misses share one query
+_inflight = {}
+
+# Bumped per getter name by invalidate(), so a read that started before a store
+# committed can tell its rows are outdated and not cache them
+_generations = {}
+_generations_lock = threading.Lock()
+
+# Reads get their own threads so they never queue behind long-running scraper jobs
+# in the loop's default executor
+DB_READ_THREADS = int(os.getenv("DB_READ_THREADS", 8))
+_db_executor = ThreadPoolExecutor(max_workers=DB_READ_THREADS, thread_name_prefix="db-read")
+
+async def single_flight(key, fn, *args):
+    """
+    Runs the blocking fn(*args) on the DB read pool, letting concurrent
+    callers with the same key await that one call instead of starting their own.
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.get_running_loop().run_in_executor(_db_executor, fn, *args)
+        _inflight[key] = task
+        # invalidate() may already have replaced this entry with a newer read
+        task.add_done_callback(lambda done: _inflight.pop(key) if _inflight.get(key) is done else None)
+
+    # Shielded so one client disconnecting doesn't cancel the query for the others
+    return await asyncio.shield(task)
+
+async def cached_body(fn, *args, ttl=30):
+    """
+    Returns the serialized success payload for fn(*args), its ETag and when it was
+    cached, from the in-process cache if the entry is younger than ttl seconds.
+    Otherwise fetches it once, then encodes and hashes it
+    so hits skip both the encoder and the hash.
+    """
+    key = (fn.__name__, args)
+
+    entry = _cache.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1:]
+
+    generation = _generations.get(fn.__name__, 0)
+    data = await single_flight(key, fn, *args)
+    body = orjson.dumps({"status": "success", "data": data})
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    cached_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    # A store committed while this read ran, so these rows may predate it
+    if _generations.get(fn.__name__, 0) == generation:
+        _cache[key] = (time.monotonic() + ttl, body, etag, cached_at)
+
+    return body, etag, cached_at
+
+def invalidate(*names):
+    """
+    Drops the cached entries for the given getter names so the next request
+    reads fresh rows. Called by the store_* functions after they commit.
+    Reads already running are detached and won't write their rows back.
+    Only this process's cache is cleared; other workers expire on their TTL.
+    """
+    with _generations_lock:
+        for name in names:
+            _generations[name] = _generations.get(name, 0) + 1
+
+    for key in list(_cache):
+        if key[0] in names:
+            _cache.pop(key, None)
+
+    for key in list(_inflight):
+        if key[0] in names:
+            _inflight.pop(key, None)
@@ -1,8 +1,13 @@
+import io
 import os
+import threading
+from contextlib import contextmanager
 import psycopg2
+from psycopg2 import pool, sql
 from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 from utils.logger import setup_logger
+from utils.cache import invalidate
 from datetime import datetime
 import time
 
@@ -11,22 +16,340 @@ logger = setup_logger("database")
 load_dotenv()
 DB_URL = os.getenv("DB_URL")
 
+# Per gunicorn worker, so the server sees up to workers x DB_POOL_MAX connections
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 1))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 5))
+# Seconds to wait for a free connection before giving up
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+# ThreadedConnectionPool raises instead of waiting when it runs dry, so callers queue here first
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+
+def get_db_pool():
+    """
+    Returns this process's PostgreSQL connection pool, creating it on first use
+    so gunicorn workers never share sockets inherited across a fork.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = pool.ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, DB_URL)
+            _pool_pid = os.getpid()
+            logger.info(f"DB connection pool created ({DB_POOL_MIN}-{DB_POOL_MAX} connections)")
+
+        return _pool
+
 def get_db_connection():
     """
-    Establishes a connection to the PostgreSQL database.
+    Checks a connection out of the pool, waiting up to DB_POOL_TIMEOUT seconds if every
+    connection is in use. Pings it first and swaps it for a fresh one if the server has dropped it.
+    Must be handed back with release_db_connection().
     """
     start_time = time.time()
+    if not _pool_slots.acquire(timeout=DB_POOL_TIMEOUT):
+        logger.error(f"No DB connection became free within {DB_POOL_TIMEOUT:.0f}s ({DB_POOL_MAX} in use)")
+        raise pool.PoolError(f"Timed out after {DB_POOL_TIMEOUT:.0f}s waiting for a DB connection")
+
     try:
-        conn = psycopg2.connect(DB_URL)
-        logger.debug(f"DB connection established in {(time.time() - start_time):.2f}s")
+        db_pool = get_db_pool()
+        conn = db_pool.getconn()
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+
+        except psycopg2.Error:
+            logger.warning("Discarding stale pooled DB connection")
+            db_pool.putconn(conn, close=True)
+            conn = db_pool.getconn()
+
+        logger.debug(f"DB connection checked out in {(time.time() - start_time):.2f}s")
         return conn
     
     except Exception as e:
+        _pool_slots.release()
         logger.error(f"Failed to connect to DB after {(time.time() - start_time):.2f}s: {e}")
         raise
 
+def release_db_connection(conn):
+    """
+    Returns a connection to the pool, rolling back anything left open
+    and closing it instead if it is no longer usable.
+    """
+    discard = bool(conn.closed)
+    try:
+        if not discard:
+            conn.rollback()
+
+    except psycopg2.Error:
+        discard = True
+
+    try:
+        get_db_pool().putconn(conn, close=discard)
+
+    finally:
+        _pool_slots.release()
+
+@contextmanager
+def db_cursor():
+    """
+    Yields a cursor on a pooled connection, closing the cursor and
+    handing the connection back when the block exits.
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            yield cur
+
+    finally:
+        release_db_connection(conn)
+
+def close_db_pool():
+    """
+    Closes every connection in this process's pool, if one was created.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.closeall()
+            logger.info("DB connection pool closed")
+
+        _pool = None
+        _pool_pid = None
+
+def unique_rows(rows, *key_columns):
+    """
+    Keeps only the last row for each conflict key, since one batched
+    INSERT ... ON CONFLICT DO UPDATE fails if it touches the same row twice.
+    """
+    return list({tuple(row[i] for i in key_columns): row for row in rows}.values())
+
+# Below this many rows a multi-row INSERT beats the extra statements COPY needs
+COPY_THRESHOLD = 1024
+
+def copy_field(value):
+    """
+    Encodes one value for COPY's text format.
+    """
+    if value is None:
+        return "\\N"
+
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+def upsert_rows(cur, table, columns, rows, on_conflict):
+    """
+    Upserts rows into table's columns, finishing the INSERT with the given
+    'ON CONFLICT ...' clause. Large batches are COPYed into a temporary staging
+    table and upserted from there in a single statement instead of being sent as VALUES lists.
+    """
+    if not rows:
+        return
+
+    column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+
+    if len(rows) < COPY_THRESHOLD:
+        insert_query = sql.SQL("INSERT INTO {table} ({columns}) VALUES %s {on_conflict}").format(
+            table=sql.Identifier(table),
+            columns=column_list,
+            on_conflict=sql.SQL(on_conflict)
+        )
+        # One statement for the whole batch rather than execute_values' default pages of 100
+        template = f"({', '.join(['%s'] * len(columns))})"
+        execute_values(cur, insert_query, rows, template=template, page_size=len(rows))
+        return
+
+    staging = sql.Identifier(f"staging_{table}")
+
+    # Only the upserted columns, with no constraints or defaults, so serial ids and
+    # updated_at are filled in by the final INSERT rather than by the staging table
+    cur.execute(sql.SQL("CREATE TEMP TABLE {staging} ON COMMIT DROP AS SELECT {columns} FROM {table} WITH NO DATA").format(
+        staging=staging,
+        columns=column_list,
+        table=sql.Identifier(table)
+    ))
+
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(copy_field(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    cur.copy_expert(sql.SQL("COPY {staging} ({columns}) FROM STDIN").format(staging=staging, columns=column_list), buffer)
+    cur.execute(sql.SQL("INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} {on_conflict}").format(
+        table=sql.Identifier(table),
+        columns=column_list,
+        staging=staging,
+        on_conflict=sql.SQL(on_conflict)
+    ))
+
+# --------------------- SCHEMA ---------------------
+
+# Tables the scrapers write to
+SCHEMA_STATEMENTS = [
+    """
+        CREATE TABLE IF NOT EXISTS earnings_reports (
+            id SERIAL PRIMARY KEY,
+            ticker TEXT NOT NULL,
+            report_date DATE NOT NULL,
+            eps_estimate TEXT,
+            reported_eps TEXT,
+            revenue_forecast TEXT,
+            reported_revenue TEXT,
+            time TEXT NOT NULL DEFAULT 'Unknown',
+            market_cap TEXT,
+            updated_at TIMESTAMP DEFAULT NOW(),
+            UNIQUE (ticker, report_date, time)
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS next_week_earnings_reports (
+            id SERIAL PRIMARY KEY,
+            ticker TEXT NOT NULL,
+            report_date DATE NOT NULL,
+            eps_estimate TEXT,
+            reported_eps TEXT,
+            revenue_forecast TEXT,
+            reported_revenue TEXT,
+            time TEXT NOT NULL DEFAULT 'Unknown',
+            market_cap TEXT,
+            updated_at TIMESTAMP DEFAULT NOW(),
+            UNIQUE (ticker, report_date, time)
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS economic_events (
+            id SERIAL PRIMARY KEY,
+            event_date TIMESTAMP NOT NULL,
+            event_time TEXT DEFAULT NULL,
+            country TEXT NOT NULL,
+            event TEXT NOT NULL,
+            actual_value TEXT,
+            forecast_value TEXT,
+            prior_value TEXT,
+            created_at TIMESTAMP DEFAULT NOW(),
+            updated_at TIMESTAMP DEFAULT NOW(),
+            UNIQUE (event_date, event, country)
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS fear_greed_index (
+            id SERIAL PRIMARY KEY,
+            date TIMESTAMP DEFAULT NOW() UNIQUE,
+            fear_value INTEGER NOT NULL,
+            category TEXT NOT NULL
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS market_holidays (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            date DATE NOT NULL,
+            status TEXT NOT NULL,
+            exchange TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT NOW(),
+            updated_at TIMESTAMP DEFAULT NOW(),
+            UNIQUE (name, date, exchange)
+        )
+    """,
+]
+
+# Tables created before updated_at existed get it added by init_schema(). It is added without
+# a default first, so existing rows stay NULL (stale) instead of being stamped with the
+# migration time, and only then given its default for new rows.
+UPDATED_AT_TABLES = ("earnings_reports", "next_week_earnings_reports", "economic_events", "market_holidays")
+
+def add_missing_updated_at(cur):
+    """
+    Adds updated_at to the tables that don't have it yet. ALTER TABLE locks out
+    reads on a live table, so it only runs when information_schema shows the column is missing.
+    """
+    cur.execute("""
+        SELECT table_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND column_name = 'updated_at' AND table_name = ANY(%s)
+    """, (list(UPDATED_AT_TABLES),))
+    migrated = {row[0] for row in cur.fetchall()}
+
+    for table in UPDATED_AT_TABLES:
+        if table in migrated:
+            continue
+
+        logger.info(f"Adding updated_at to {table}")
+        cur.execute(sql.SQL("ALTER TABLE {table} ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP").format(table=sql.Identifier(table)))
+        cur.execute(sql.SQL("ALTER TABLE {table} ALTER COLUMN updated_at SET DEFAULT NOW()").format(table=sql.Identifier(table)))
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+def init_schema():
+    """
+    Creates the scraper tables if they don't exist. Called once from the app's
+    lifespan hook; later calls, like the ones at the top of each store_* function,
+    return immediately so DDL stays off the write path.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return True
+
+    with _schema_lock:
+        if _schema_ready:
+            return True
+
+        try:
+            with db_cursor() as cur:
+                for statement in SCHEMA_STATEMENTS:
+                    cur.execute(statement)
+
+                add_missing_updated_at(cur)
+                cur.connection.commit()
+
+            _schema_ready = True
+            logger.info("Database schema ready")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to initialize database schema: {e}")
+            return False
+
+# --------------------- FRESHNESS ---------------------
+
+# Column recording when each scraped table last received rows
+LAST_UPDATED_COLUMNS = {
+    "earnings_reports": "updated_at",
+    "next_week_earnings_reports": "updated_at",
+    "economic_events": "updated_at",
+    "fear_greed_index": "date",
+    "market_holidays": "updated_at",
+}
+
+def get_table_age(table):
+    """
+    Returns how long ago the given table last received scraped rows,
+    or None if it is empty, missing or can't be read.
+    """
+    query = sql.SQL("SELECT NOW()::timestamp - MAX({column}) FROM {table}").format(
+        column=sql.Identifier(LAST_UPDATED_COLUMNS[table]),
+        table=sql.Identifier(table)
+    )
+
+    try:
+        with db_cursor() as cur:
+            cur.execute(query)
+            return cur.fetchone()[0]
+
+    except Exception as e:
+        logger.warning(f"Could not read last update time for {table}: {e}")
+        return None
+
 # --------------------- EARNINGS REPORT DATABASE FUNCTIONS ---------------------
 
+# Columns both earnings tables are upserted into, in data_values order
+EARNINGS_COLUMNS = ("ticker", "report_date", "eps_estimate", "reported_eps", "revenue_forecast", "reported_revenue", "time", "market_cap")
+
 def store_earnings_data(data):
     """
     Stores earnings data in the PostgreSQL database.
@@ -38,37 +361,20 @@ def store_earnings_data(data):
 
     start_time = time.time()
     try:
+        init_schema()
         conn = get_db_connection()
         cur = conn.cursor()
 
-        logger.debug("Ensuring earnings_reports table exists")
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS earnings_reports (
-                id SERIAL PRIMARY KEY,
-                ticker TEXT NOT NULL,
-                report_date DATE NOT NULL,
-                eps_estimate TEXT,
-                reported_eps TEXT,
-                revenue_forecast TEXT,
-                reported_revenue TEXT,
-                time TEXT NOT NULL DEFAULT 'Unknown',
-                market_cap TEXT,
-                UNIQUE (ticker, report_date, time)
-            )
-        """)
-        conn.commit()
-
         logger.debug(f"Attempting to store {len(data)} earnings records")
         
-        insert_query = """
-        INSERT INTO earnings_reports (ticker, report_date, eps_estimate, reported_eps, revenue_forecast, reported_revenue, time, market_cap)
-        VALUES %s
+        on_conflict = """
         ON CONFLICT (ticker, report_date, time) DO UPDATE
         SET eps_estimate = EXCLUDED.eps_estimate,
             reported_eps = EXCLUDED.reported_eps,
             revenue_forecast = EXCLUDED.revenue_forecast,
             reported_revenue = EXCLUDED.reported_revenue,
-            market_cap = EXCLUDED.market_cap;
+            market_cap = EXCLUDED.market_cap,
+            updated_at = NOW();
         """
 
         data_values = [
@@ -85,51 +391,51 @@ def store_earnings_data(data):
             for record in data
         ]
 
-        execute_values(cur, insert_query, data_values)
+        upsert_rows(cur, "earnings_reports", EARNINGS_COLUMNS, unique_rows(data_values, 0, 1, 6), on_conflict)
         conn.commit()
         duration = time.time() - start_time
         logger.info(f"Successfully stored {len(data)} earnings reports in {duration:.2f}s")
+        invalidate("get_latest_earnings")
 
     except Exception as e:
         duration = time.time() - start_time
         logger.error(f"Database error (Earnings Reports) after {duration:.2f}s: {e}")
     
     finally:
-        cur.close()
-        conn.close()
+        if 'cur' in locals():
+            cur.close()
+
+        if 'conn' in locals():
+            release_db_connection(conn)
 
 
 def get_latest_earnings():
     """
     Fetches all earnings reports from the database.
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT ticker, report_date, eps_estimate, reported_eps, revenue_forecast, reported_revenue, time, market_cap
+            FROM earnings_reports
+            ORDER BY report_date DESC;
+        """)
 
-    cur.execute("""
-        SELECT ticker, report_date, eps_estimate, reported_eps, revenue_forecast, reported_revenue, time, market_cap
-        FROM earnings_reports
-        ORDER BY report_date DESC;
-    """)
-
-    rows = cur.fetchall()
-    earnings_data = [
-        {
-            "Ticker": row[0],
-            "Date Reporting": row[1],
-            "EPS Estimate": row[2],
-            "Reported EPS": row[3],
-            "Revenue Forecast": row[4],
-            "Reported Revenue": row[5],
-            "Time": row[6] if row[6] else "Unknown",
-            "Market Cap": row[7]
-        }
-        for row in rows
-    ]
-
-    cur.close()
-    conn.close()
-    return earnings_data
+        rows = cur.fetchall()
+        earnings_data = [
+            {
+                "Ticker": row[0],
+                "Date Reporting": row[1],
+                "EPS Estimate": row[2],
+                "Reported EPS": row[3],
+                "Revenue Forecast": row[4],
+                "Reported Revenue": row[5],
+                "Time": row[6] if row[6] else "Unknown",
+                "Market Cap": row[7]
+            }
+            for row in rows
+        ]
+
+        return earnings_data
 
 # --------------------- NEXT WEEK EARNINGS DATABASE FUNCTIONS ---------------------
 
@@ -144,37 +450,20 @@ def store_next_week_earnings_data(data):
 
     start_time = time.time()
     try:
+        init_schema()
         conn = get_db_connection()
         cur = conn.cursor()
 
-        logger.debug("Ensuring next_week_earnings_reports table exists")
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS next_week_earnings_reports (
-                id SERIAL PRIMARY KEY,
-                ticker TEXT NOT NULL,
-                report_date DATE NOT NULL,
-                eps_estimate TEXT,
-                reported_eps TEXT,
-                revenue_forecast TEXT,
-                reported_revenue TEXT,
-                time TEXT NOT NULL DEFAULT 'Unknown',
-                market_cap TEXT,
-                UNIQUE (ticker, report_date, time)
-            )
-        """)
-        conn.commit()
-
         logger.debug(f"Attempting to store {len(data)} next week earnings records")
         
-        insert_query = """
-        INSERT INTO next_week_earnings_reports (ticker, report_date, eps_estimate, reported_eps, revenue_forecast, reported_revenue, time, market_cap)
-        VALUES %s
+        on_conflict = """
         ON CONFLICT (ticker, report_date, time) DO UPDATE
         SET eps_estimate = EXCLUDED.eps_estimate,
             reported_eps = EXCLUDED.reported_eps,
             revenue_forecast = EXCLUDED.revenue_forecast,
             reported_revenue = EXCLUDED.reported_revenue,
-            market_cap = EXCLUDED.market_cap;
+            market_cap = EXCLUDED.market_cap,
+            updated_at = NOW();
         """
 
         data_values = [
@@ -191,28 +480,29 @@ def store_next_week_earnings_data(data):
             for record in data
         ]
 
-        execute_values(cur, insert_query, data_values)
+        upsert_rows(cur, "next_week_earnings_reports", EARNINGS_COLUMNS, unique_rows(data_values, 0, 1, 6), on_conflict)
         conn.commit()
         duration = time.time() - start_time
         logger.info(f"Successfully stored {len(data)} next week earnings reports in {duration:.2f}s")
+        invalidate("get_latest_next_week_earnings")
 
     except Exception as e:
         duration = time.time() - start_time
         logger.error(f"Database error (Next Week Earnings Reports) after {duration:.2f}s: {e}")
     
     finally:
-        cur.close()
-        conn.close()
+        if 'cur' in locals():
+            cur.close()
+
+        if 'conn' in locals():
+            release_db_connection(conn)
 
 def get_latest_next_week_earnings():
     """
     Fetches all next week's earnings reports from the database.
     Returns an empty list if the table doesn't exist yet.
     """
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
+    with db_cursor() as cur:
         cur.execute("""
             SELECT EXISTS (
                 SELECT FROM information_schema.tables 
@@ -249,19 +539,10 @@ def get_latest_next_week_earnings():
 
         return earnings_data
 
-    except Exception as e:
-        logger.error(f"Error fetching next week earnings: {e}")
-        return []
-
-    finally:
-        if 'cur' in locals():
-            cur.close()
-            
-        if 'conn' in locals():
-            conn.close()
-
 # --------------------- ECONOMIC EVENTS DATABASE FUNCTIONS ---------------------
 
+ECONOMIC_EVENT_COLUMNS = ("event_date", "event_time", "country", "event", "actual_value", "forecast_value", "prior_value")
+
 def store_economic_data(economic_data):
     """
     Stores economic event data in the PostgreSQL database.
@@ -272,33 +553,17 @@ def store_economic_data(economic_data):
         return
 
     try:
+        init_schema()
         conn = get_db_connection()
         cur = conn.cursor()
 
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS economic_events (
-                id SERIAL PRIMARY KEY,
-                event_date TIMESTAMP NOT NULL,
-                event_time TEXT DEFAULT NULL,
-                country TEXT NOT NULL,
-                event TEXT NOT NULL,
-                actual_value TEXT,
-                forecast_value TEXT,
-                prior_value TEXT,
-                created_at TIMESTAMP DEFAULT NOW(),
-                UNIQUE (event_date, event, country)
-            )
-        """)
-        conn.commit()
-
-        insert_query = """
-        INSERT INTO economic_events (event_date, event_time, country, event, actual_value, forecast_value, prior_value)
-        VALUES %s
+        on_conflict = """
         ON CONFLICT (event_date, event, country) 
         DO UPDATE SET
             actual_value = EXCLUDED.actual_value,
             forecast_value = EXCLUDED.forecast_value,
-            prior_value = EXCLUDED.prior_value;
+            prior_value = EXCLUDED.prior_value,
+            updated_at = NOW();
         """
 
         data_values = [
@@ -314,47 +579,47 @@ def store_economic_data(economic_data):
             for record in economic_data
         ]
 
-        execute_values(cur, insert_query, data_values) 
+        upsert_rows(cur, "economic_events", ECONOMIC_EVENT_COLUMNS, unique_rows(data_values, 0, 3, 2), on_conflict)
         conn.commit()
         logger.info(f"Successfully stored {len(economic_data)} economic events in the database.")
+        invalidate("get_latest_economic_events")
 
     except Exception as e:
         logger.error(f"Database error (Economic Events): {e}")
     
     finally:
-        cur.close()
-        conn.close()
+        if 'cur' in locals():
+            cur.close()
+
+        if 'conn' in locals():
+            release_db_connection(conn)
 
 def get_latest_economic_events():
     """
     Fetches all stored economic events from the database.
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT event_date, event_time, country, event, actual_value, forecast_value, prior_value
+            FROM economic_events
+            ORDER BY event_date DESC;
+        """)
 
-    cur.execute("""
-        SELECT event_date, event_time, country, event, actual_value, forecast_value, prior_value
-        FROM economic_events
-        ORDER BY event_date DESC;
-    """)
-
-    rows = cur.fetchall()
-    econ_data = [
-        {
-            "Date": row[0],
-            "Time": row[1] if row[1] else "Unknown",
-            "Country": row[2],
-            "Event": row[3],
-            "Actual": row[4],
-            "Forecast": row[5],
-            "Prior": row[6],
-        }
-        for row in rows
-    ]
-
-    cur.close()
-    conn.close()
-    return econ_data
+        rows = cur.fetchall()
+        econ_data = [
+            {
+                "Date": row[0],
+                "Time": row[1] if row[1] else "Unknown",
+                "Country": row[2],
+                "Event": row[3],
+                "Actual": row[4],
+                "Forecast": row[5],
+                "Prior": row[6],
+            }
+            for row in rows
+        ]
+
+        return econ_data
 
 # --------------------- FEAR SENTIMENT DATABASE FUNCTIONS ---------------------
 
@@ -363,127 +628,119 @@ def store_fear_greed_index(fear_value, category):
     Stores the Fear & Greed Index value in PostgreSQL.
     Prevents duplicate entries for the same date.
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
+    try:
+        init_schema()
+        conn = get_db_connection()
+        cur = conn.cursor()
 
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS fear_greed_index (
-            id SERIAL PRIMARY KEY,
-            date TIMESTAMP DEFAULT NOW() UNIQUE,
-            fear_value INTEGER NOT NULL,
-            category TEXT NOT NULL
-        )
-    """)
-    conn.commit()  
+        cur.execute("""
+            INSERT INTO fear_greed_index (date, fear_value, category)
+            VALUES (NOW(), %s, %s)
+            ON CONFLICT (date) DO UPDATE
+            SET fear_value = EXCLUDED.fear_value,
+                category = EXCLUDED.category;
+        """, (fear_value, category))
 
-    cur.execute("""
-        INSERT INTO fear_greed_index (date, fear_value, category)
-        VALUES (NOW(), %s, %s)
-        ON CONFLICT (date) DO UPDATE
-        SET fear_value = EXCLUDED.fear_value,
-            category = EXCLUDED.category;
-    """, (fear_value, category))
+        conn.commit()
+        invalidate("get_latest_fear_greed")
+
+    finally:
+        if 'cur' in locals():
+            cur.close()
 
-    conn.commit()
-    cur.close()
-    conn.close()
+        if 'conn' in locals():
+            release_db_connection(conn)
 
 def get_latest_fear_greed():
     """
     Fetches all stored Fear & Greed Index data.
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
+    with db_cursor() as cur:
+        cur.execute("""
+            SELECT date, fear_value, category
+            FROM fear_greed_index
+            ORDER BY date DESC;
+        """)
 
-    cur.execute("""
-        SELECT date, fear_value, category
-        FROM fear_greed_index
-        ORDER BY date DESC;
-    """)
-
-    rows = cur.fetchall()
-    fear_greed_data = [
-        {
-            "Date": row[0],
-            "Fear Value": row[1],
-            "Category": row[2],
-        }
-        for row in rows
-    ]
-
-    cur.close()
-    conn.close()
-    return fear_greed_data
+        rows = cur.fetchall()
+        fear_greed_data = [
+            {
+                "Date": row[0],
+                "Fear Value": row[1],
+                "Category": row[2],
+            }
+            for row in rows
+        ]
+
+        return fear_greed_data
 
 # ---------------------------- STORE MARKET HOLIDAYS ----------------------------
 
+MARKET_HOLIDAY_COLUMNS = ("name", "date", "status", "exchange", "year")
+
 def store_market_holidays(holidays_data):
     """
-    Stores the Fear & Greed Index value in PostgreSQL.
-    Prevents duplicate entries for the same date.
+    Stores market holidays in PostgreSQL.
+    Prevents duplicates and updates existing records.
     """
     if not holidays_data:
         logger.info("No market holidays data to store.")
         return False
 
     try:
+        init_schema()
         conn = get_db_connection()
         cur = conn.cursor()
 
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS market_holidays (
-                id SERIAL PRIMARY KEY,
-                name TEXT NOT NULL,
-                date DATE NOT NULL,
-                status TEXT NOT NULL,
-                exchange TEXT NOT NULL,
-                year INTEGER NOT NULL,
-                created_at TIMESTAMP DEFAULT NOW(),
-                UNIQUE (name, date, exchange)
-            )
-        """)
-        conn.commit()
-
+        # Parse dates up front so one bad row is skipped instead of failing the batch
+        data_values = []
         for holiday in holidays_data:
             try:
                 holiday_date = datetime.strptime(holiday["date"], "%Y-%m-%d").date()
 
-                cur.execute("""
-                    INSERT INTO market_holidays (name, date, status, exchange, year)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (name, date, exchange) 
-                    DO UPDATE SET
-                        status = EXCLUDED.status,
-                        year = EXCLUDED.year
-                """, (
-                    holiday["name"],
-                    holiday_date,
-                    holiday["status"],
-                    holiday["exchange"],
-                    holiday["year"]
-                ))
-                conn.commit()
-            except Exception as e:
+            except (KeyError, TypeError, ValueError) as e:
                 logger.error(f"Error storing holiday {holiday.get('name', 'Unknown')}: {e}")
-                conn.rollback()
+                continue
+
+            data_values.append((
+                holiday["name"],
+                holiday_date,
+                holiday["status"],
+                holiday["exchange"],
+                holiday["year"]
+            ))
+
+        on_conflict = """
+        ON CONFLICT (name, date, exchange)
+        DO UPDATE SET
+            status = EXCLUDED.status,
+            year = EXCLUDED.year,
+            updated_at = NOW();
+        """
+
+        upsert_rows(cur, "market_holidays", MARKET_HOLIDAY_COLUMNS, unique_rows(data_values, 0, 1, 3), on_conflict)
+        conn.commit()
 
-        logger.info(f"Successfully stored {len(holidays_data)} market holidays in the database.")
-        cur.close()
-        conn.close()
+        logger.info(f"Successfully stored {len(data_values)} market holidays in the database.")
+        invalidate("get_latest_market_holidays")
         return True
 
     except Exception as e:
         logger.error(f"Database error (Market Holidays): {e}")
         return False
 
+    finally:
+        if 'cur' in locals():
+            cur.close()
+
+        if 'conn' in locals():
+            release_db_connection(conn)
+
 def get_latest_market_holidays():
     """
     Fetches all market holidays from the database.
     """
-    try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
+    with db_cursor() as cur:
         cur.execute("""
             SELECT name, date, status, exchange, year
             FROM market_holidays
@@ -495,7 +752,7 @@ def get_latest_market_holidays():
         holidays_data = [
             {
                 "name": row[0],
-                "date": row[1].strftime("%Y-%m-%d"),
+                "date": row[1],
                 "status": row[2],
                 "exchange": row[3],
                 "year": row[4]
@@ -503,14 +760,8 @@ def get_latest_market_holidays():
             for row in rows
         ]
 
-        cur.close()
-        conn.close()
         return holidays_data
 
-    except Exception as e:
-        logger.error(f"Error fetching market holidays: {e}")
-        return []
-
 # --------------------- TOP STOCKS DATABASE FUNCTIONS ---------------------
 
 def create_top_stocks_table():
@@ -539,7 +790,7 @@ def create_top_stocks_table():
 
     finally:
         if 'conn' in locals():
-            conn.close()
+            release_db_connection(conn)
 
 def execute_query(query, params=None):
     """
@@ -562,8 +813,11 @@ def execute_query(query, params=None):
         raise e
     
     finally:
-        cur.close()
-        conn.close()
+        if 'cur' in locals():
+            cur.close()
+
+        if 'conn' in locals():
+            release_db_connection(conn)
 
 def store_top_stocks(category, stocks_data):
     """
@@ -581,11 +835,12 @@ def store_top_stocks(category, stocks_data):
             WHERE category = %s AND date = CURRENT_DATE
         """, (category,))
         
-        for stock in stocks_data:
-            cur.execute("""
-                INSERT INTO top_stocks (category, ticker, rank, date)
-                VALUES (%s, %s, %s, CURRENT_DATE)
-            """, (category, stock['ticker'], stock['rank']))
+        data_values = [(category, stock['ticker'], stock['rank']) for stock in stocks_data]
+
+        execute_values(cur, """
+            INSERT INTO top_stocks (category, ticker, rank, date)
+            VALUES %s
+        """, data_values, template="(%s, %s, %s, CURRENT_DATE)")
             
         conn.commit()
         logger.info(f"Successfully stored {len(stocks_data)} top stocks for {category}")
@@ -595,7 +850,7 @@ def store_top_stocks(category, stocks_data):
         raise
     finally:
         if 'conn' in locals():
-            conn.close()
+            release_db_connection(conn)
 
 def get_latest_top_stocks(category=None, limit=5):
     """
@@ -636,5 +891,5 @@ def get_latest_top_stocks(category=None, limit=5):
     
     finally:
         if 'conn' in locals():
-            conn.close()
+            release_db_connection(conn)
 
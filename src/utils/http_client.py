@@ -0,0 +1,41 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Back off on rate limits / gateway errors instead of losing the whole run
+RETRY_POLICY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=[429, 502, 503, 504],
+    allowed_methods=["GET"],
+    respect_retry_after_header=True
+)
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """
+    Returns the process-wide keep-alive HTTP session shared by all scrapers.
+    Created on first use so each gunicorn worker builds its own pool after fork.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update({"Connection": "keep-alive"})
+            session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=RETRY_POLICY))
+            _session = session
+
+        return _session
+
+def close_session():
+    """
+    Closes the shared HTTP session and its pooled connections.
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
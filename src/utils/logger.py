@@ -1,5 +1,32 @@
 import logging
+import os
 import sys
+import orjson
+
+# Set LOG_FORMAT=json to emit one JSON object per line instead of plain text
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class JSONFormatter(logging.Formatter):
+    """
+    Serializes each record, plus any fields passed through extra=, with orjson
+    in a single call.
+    """
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, self.datefmt),
+            "name": record.name,
+            "level": record.levelname,
+            "msg": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+
+        return orjson.dumps(entry, default=str).decode()
 
 def setup_logger(name=None):
     """
@@ -7,20 +34,23 @@ def setup_logger(name=None):
     since digital Ocean App Platform automatically collects stdout/stderr.
     """
     logger = logging.getLogger(name or "app")
-    
+
     if logger.handlers:
         return logger
-    
+
     handler = logging.StreamHandler(sys.stdout)
-    
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+
+    if LOG_FORMAT == "json":
+        formatter = JSONFormatter(datefmt='%Y-%m-%d %H:%M:%S')
+    else:
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
     handler.setFormatter(formatter)
-    
+
     logger.addHandler(handler)
     logger.setLevel(logging.INFO)
     logger.propagate = False
-    
-    return logger
\ No newline at end of file
+
+    return logger